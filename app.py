@@ -1,4 +1,7 @@
 import os
+import re
+import sys
+import json
 import requests
 from io import BytesIO
 from flask import Flask, render_template, request, jsonify, send_file, redirect, url_for
@@ -14,6 +17,26 @@ try:
 except Exception:
     maps_bp = None
 
+# ---------------------- Optional local places index ---------------------- #
+try:
+    from src.places_index import get_places_index, nearby_context, haversine_km
+except Exception:
+    get_places_index = None
+
+# ---------------------- Optional RAG retriever ---------------------- #
+# rag_pipeline uses flat imports (helper, logger, bm25_index) from src/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "src"))
+try:
+    from rag_pipeline import get_retriever
+except Exception:
+    get_retriever = None
+
+# ---------------------- Optional WebSocket support ---------------------- #
+try:
+    from flask_sock import Sock
+except Exception:
+    Sock = None
+
 # ---------------------- Setup ---------------------- #
 load_dotenv()
 app = Flask(__name__)
@@ -22,6 +45,8 @@ CORS(app)
 if maps_bp:
     app.register_blueprint(maps_bp)
 
+sock = Sock(app) if Sock else None
+
 SARVAM_API_KEY = os.getenv("SARVAM_API_KEY")
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 
@@ -46,6 +71,8 @@ LANGUAGE_CODES = {
 
 USE_COMBINED_STT_TRANSLATE = True  # unified STT+Translate
 
+WS_MAX_AUDIO_BYTES = 10 * 1024 * 1024  # cap per-utterance buffer for /ws/speech
+
 # ---------------------- Translation ---------------------- #
 def translate_text(text, source_lang="auto", target_lang="en-IN"):
     """Auto-detect + safe translation with truncation and fallback."""
@@ -152,11 +179,16 @@ def text_to_speech(text, target_lang="en-IN", speaker="anushka"):
 
 def speech_to_text_translate(file_storage, content_type="audio/webm"):
     """Unified Speech-to-Text + Translate (Sarvam) directly from uploaded FileStorage."""
+    # Read bytes now so requests can stream them safely
+    raw = file_storage.read()
+    return speech_bytes_to_text_translate(raw, file_storage.filename or "mic_input.webm", content_type)
+
+
+def speech_bytes_to_text_translate(raw, filename="mic_input.webm", content_type="audio/webm"):
+    """Unified Speech-to-Text + Translate (Sarvam) from raw audio bytes."""
     try:
         headers = {"api-subscription-key": SARVAM_API_KEY}
-        # Read bytes now so requests can stream them safely
-        raw = file_storage.read()
-        files = {"file": (file_storage.filename or "mic_input.webm", BytesIO(raw), content_type)}
+        files = {"file": (filename, BytesIO(raw), content_type)}
         data = {"model": "saaras:v2.5"}
         res = requests.post(
             "https://api.sarvam.ai/speech-to-text-translate",
@@ -208,6 +240,7 @@ system_prompt = (
     "5) Who will enjoy it more\n"
     "End the comparison with a simple, helpful recommendation.\n\n"
     "Your goal is to make the visitor feel comfortable and guided — like you're walking with them through Kolkata."
+    "{context}"
 )
 
 prompt = ChatPromptTemplate.from_messages([
@@ -218,6 +251,18 @@ prompt = ChatPromptTemplate.from_messages([
 llm = get_llm()
 tourism_chain = LLMChain(llm=llm, prompt=prompt)
 
+def load_retriever():
+    """Hybrid BM25 + vector retriever over the tourism guide, or None if unavailable."""
+    if not get_retriever:
+        return None
+    try:
+        return get_retriever()
+    except Exception as e:
+        print("⚠️ RAG retriever unavailable:", e)
+        return None
+
+retriever = load_retriever()
+
 # ---------------------- Compare Helpers ---------------------- #
 def is_compare_query(text: str) -> bool:
     t = (text or "").lower()
@@ -231,6 +276,82 @@ def enrich_compare_prompt(text: str) -> str:
           " (e.g., history lovers, families, quick photo stop, evening walk)."
     )
 
+def retrieve_context(text: str) -> str:
+    """Guide excerpts for the prompt (BM25-only for landmark queries, else fused)."""
+    if not retriever or not text:
+        return ""
+    try:
+        docs = retriever.invoke(text)
+    except Exception as e:
+        print("📚 Retrieval error/skip:", e)
+        return ""
+    if not docs:
+        return ""
+    return (
+        "\n\nReference notes from the West Bengal tourism guide:\n"
+        + "\n---\n".join(d.page_content for d in docs)
+        + "\nUse these facts where relevant."
+    )
+
+def ask_guide(text: str, context: str = "") -> str:
+    """Run the tourism chain on English input (compare-enriched if needed)."""
+    try:
+        prompt_in = enrich_compare_prompt(text) if is_compare_query(text) else text
+        context = retrieve_context(text) + context
+        response = tourism_chain.invoke({"input": prompt_in, "context": context})
+        return response.get("text", "") if isinstance(response, dict) else str(response)
+    except Exception as e:
+        print("🚨 Gemini Error:", e)
+        return "I'm having trouble connecting to Gemini right now."
+
+def split_sentences(text: str):
+    """Split a reply into sentence-sized pieces for incremental TTS."""
+    parts = re.split(r"(?<=[.!?।])\s+", (text or "").strip())
+    return [p for p in parts if p.strip()]
+
+def find_nearby(text: str, k: int = 5, radius_km: float = 2.0):
+    """Match known places in text; return (map_data, prompt context) from the local index."""
+    try:
+        if not get_places_index:
+            return None, ""
+        index = get_places_index()
+        places = index.find_places(text)
+        if not places:
+            return None, ""
+
+        if is_compare_query(text) and len(places) > 1:
+            return compare_places(index, places[:3], radius_km)
+
+        place = places[0]
+        results = nearby_results(index, place, k, radius_km)
+        map_data = {"label": place["name"], "lat": place["lat"], "lon": place["lon"], "nearby": results}
+        return map_data, nearby_context(place, results)
+    except Exception as e:
+        print("📍 Nearby lookup error/skip:", e)
+        return None, ""
+
+def nearby_results(index, place, k, radius_km):
+    """Up to k places within radius_km of place, excluding the place itself."""
+    return [
+        r for r in index.within_radius(place["lat"], place["lon"], radius_km, limit=k + 1)
+        if r["name"] != place["name"]
+    ][:k]
+
+def compare_places(index, places, radius_km, k: int = 3):
+    """Nearby context for every compared place; the map shows all of them."""
+    context = "".join(
+        nearby_context(p, nearby_results(index, p, k, radius_km)) for p in places
+    )
+    first, others = places[0], places[1:]
+    dists = haversine_km(first["lat"], first["lon"], [p["lat"] for p in others], [p["lon"] for p in others])
+    map_data = {
+        "label": " vs ".join(p["name"] for p in places),
+        "lat": first["lat"],
+        "lon": first["lon"],
+        "nearby": [{**p, "distance_km": round(float(d), 3)} for p, d in zip(others, dists)],
+    }
+    return map_data, context
+
 def geocode_place(user_text: str):
     try:
         if not maps_bp:
@@ -283,17 +404,12 @@ def chat_api():
 
     translated_input, detected_lang = translate_text(user_message, src_code, "en-IN")
 
-    if is_compare_query(translated_input):
-        translated_input = enrich_compare_prompt(translated_input)
-
-    map_data = geocode_place(user_message)
+    # Local spatial index first; remote geocoding only for places it doesn't know
+    map_data, context = find_nearby(translated_input)
+    if not map_data:
+        map_data = geocode_place(user_message)
 
-    try:
-        response = tourism_chain.invoke({"input": translated_input, "context": ""})
-        llm_response = response.get("text", "") if isinstance(response, dict) else str(response)
-    except Exception as e:
-        print("🚨 Gemini Error:", e)
-        llm_response = "I'm having trouble connecting to Gemini right now."
+    llm_response = ask_guide(translated_input, context)
 
     translated_output, _ = translate_text(llm_response, "en-IN", src_code)
 
@@ -319,14 +435,9 @@ def speech():
     # STT + translate
     transcript, detected_lang = speech_to_text_translate(audio_data, content_type)
 
-    # LLM (enrich if compare)
-    try:
-        prompt_in = enrich_compare_prompt(transcript) if is_compare_query(transcript) else transcript
-        response = tourism_chain.invoke({"input": prompt_in, "context": ""})
-        llm_response = response.get("text", "") if isinstance(response, dict) else str(response)
-    except Exception as e:
-        print("🚨 Gemini Error:", e)
-        llm_response = "I'm having trouble connecting to Gemini right now."
+    # LLM (enrich if compare) with nearby-places context
+    map_data, context = find_nearby(transcript)
+    llm_response = ask_guide(transcript, context)
 
     # Translate to detected speech language
     final_text, _ = translate_text(llm_response, "en-IN", detected_lang)
@@ -353,7 +464,82 @@ def speech():
         return resp
 
     # Fallback to text if TTS fails
-    return jsonify({"response": final_text, "detected_language": detected_lang})
+    return jsonify({"response": final_text, "detected_language": detected_lang, "map_data": map_data})
+
+# ---------------------- WebSocket voice ---------------------- #
+def speech_ws(ws):
+    """
+    Full-duplex voice mode.
+    Client → {"type": "start", "mime"}, binary audio chunks, {"type": "end"}
+    Server → {"type": "transcript"}, {"type": "reply"}, then per sentence
+             {"type": "audio", "mime"} followed by one binary frame, finally {"type": "done"}
+    """
+    print("🎙️ Voice socket opened")
+    buffer = BytesIO()
+    content_type = "audio/webm"
+
+    while True:
+        msg = ws.receive()
+        if msg is None:
+            return
+
+        if isinstance(msg, (bytes, bytearray)):
+            if buffer.tell() + len(msg) > WS_MAX_AUDIO_BYTES:
+                ws.send(json.dumps({"type": "error", "error": "Audio too long"}))
+                return
+            buffer.write(msg)
+            continue
+
+        try:
+            ctrl = json.loads(msg)
+        except ValueError:
+            continue
+        if not isinstance(ctrl, dict):
+            continue
+
+        kind = ctrl.get("type")
+        if kind == "start":
+            buffer = BytesIO()
+            content_type = (ctrl.get("mime") or "audio/webm").split(";")[0]
+        elif kind == "end":
+            _answer_voice_turn(ws, buffer.getvalue(), content_type)
+            buffer = BytesIO()
+
+
+def _answer_voice_turn(ws, raw, content_type):
+    """STT+Translate → Gemini → Translate back → sentence-wise TTS, pushed as ready."""
+    if not raw:
+        ws.send(json.dumps({"type": "error", "error": "No audio received"}))
+        return
+
+    ext = "ogg" if "ogg" in content_type else "webm"
+    transcript, detected_lang = speech_bytes_to_text_translate(raw, f"mic_input.{ext}", content_type)
+    if not transcript:
+        ws.send(json.dumps({"type": "error", "error": "Could not understand the audio"}))
+        return
+    ws.send(json.dumps({"type": "transcript", "text": transcript, "detected_language": detected_lang}))
+
+    map_data, context = find_nearby(transcript)
+    llm_response = ask_guide(transcript, context)
+    final_text, _ = translate_text(llm_response, "en-IN", detected_lang)
+    ws.send(json.dumps({
+        "type": "reply",
+        "response": final_text,
+        "detected_language": detected_lang,
+        "map_data": map_data,
+    }))
+
+    for sentence in split_sentences(final_text):
+        tts_audio, tts_mime = text_to_speech(sentence, target_lang=detected_lang)
+        if not tts_audio:
+            continue
+        ws.send(json.dumps({"type": "audio", "mime": tts_mime or "audio/mpeg"}))
+        ws.send(tts_audio.getvalue())
+
+    ws.send(json.dumps({"type": "done"}))
+
+if sock:
+    sock.route("/ws/speech")(speech_ws)
 
 # ---------------------- Run ---------------------- #
 if __name__ == "__main__":
@@ -0,0 +1,175 @@
+import gzip
+import json
+import math
+import os
+import re
+from collections import Counter
+from logger import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_INDEX_PATH = "data/bm25_index.json.gz"
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "has", "in",
+    "is", "it", "its", "of", "on", "or", "that", "the", "to", "was", "were",
+    "which", "with", "what", "where", "when", "how", "can", "i", "me", "my",
+    "you", "your", "there", "this", "near", "about", "tell", "visit", "see",
+}
+
+# Capitalised runs in the raw chunks ("Belur Math", "Bishnupur") are taken as
+# landmark names. A query naming one is answered from BM25 alone.
+PROPER_NOUN_RE = re.compile(r"\b[A-Z][a-zA-Z]+(?:\s+[A-Z][a-zA-Z]+){0,2}\b")
+LANDMARK_MIN_CAPITALISED = 0.9   # share of a word's occurrences that must be capitalised
+LANDMARK_MAX_DF = 0.1            # skip words found in more than 10% of chunks (e.g. "Kolkata")
+
+
+def tokenize(text: str):
+    """Lowercase word tokens without stopwords."""
+    return [t for t in TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+def extract_landmarks(texts, postings, n_docs):
+    """Token tuples for rare, consistently capitalised names in the corpus."""
+    capitalised, runs = Counter(), set()
+    for text in texts:
+        for m in PROPER_NOUN_RE.finditer(text or ""):
+            tokens = tuple(tokenize(m.group()))
+            if tokens:
+                runs.add(tokens)
+            for word in m.group().split():
+                capitalised[word.lower()] += 1
+
+    total = Counter(t for text in texts for t in TOKEN_RE.findall((text or "").lower()))
+    max_df = max(2, LANDMARK_MAX_DF * n_docs)
+
+    def is_name(word):
+        return (
+            word not in STOPWORDS
+            and not word.isdigit()
+            and capitalised[word] >= LANDMARK_MIN_CAPITALISED * total[word]
+            and len(postings.get(word, ((),))[0]) <= max_df
+        )
+
+    phrases = set()
+    for run in runs:
+        names = [w for w in run if is_name(w)]
+        if len(run) > 1 and names:
+            phrases.add(run)
+        phrases.update((w,) for w in names)
+    return sorted(phrases)
+
+
+class BM25Index:
+    """Okapi BM25 inverted index over cleaned text chunks."""
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, landmarks=None):
+        self.k1 = k1
+        self.b = b
+        self.landmarks = [tuple(phrase) for phrase in landmarks or []]
+        self.docs = []        # [{"text": ..., "metadata": {...}}]
+        self.doc_len = []
+        self.avgdl = 0.0
+        self.postings = {}    # term -> ([doc_id, ...], [tf, ...])
+        self.idf = {}
+
+    # ---------------------- Build ---------------------- #
+    @classmethod
+    def from_texts(cls, texts, metadatas=None, **kwargs):
+        """Build the index from already-cleaned chunk texts (landmarks derived unless given)."""
+        index = cls(**kwargs)
+        metadatas = metadatas or [{} for _ in texts]
+        for doc_id, (text, meta) in enumerate(zip(texts, metadatas)):
+            tokens = tokenize(text)
+            index.docs.append({"text": text, "metadata": meta or {}})
+            index.doc_len.append(len(tokens))
+            for term, tf in Counter(tokens).items():
+                ids, tfs = index.postings.setdefault(term, ([], []))
+                ids.append(doc_id)
+                tfs.append(tf)
+        if not index.landmarks:
+            index.landmarks = extract_landmarks(texts, index.postings, len(index.docs))
+        index._finalize()
+        return index
+
+    def _finalize(self):
+        n = len(self.docs)
+        self.avgdl = (sum(self.doc_len) / n) if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(ids) + 0.5) / (len(ids) + 0.5))
+            for term, (ids, _) in self.postings.items()
+        }
+
+    # ---------------------- Persistence ---------------------- #
+    def save(self, path: str = DEFAULT_INDEX_PATH):
+        """Write the index as gzipped JSON with delta-encoded posting lists."""
+        postings = {}
+        for term, (ids, tfs) in self.postings.items():
+            deltas = [ids[0]] + [ids[i] - ids[i - 1] for i in range(1, len(ids))]
+            postings[term] = [deltas, tfs]
+
+        payload = {
+            "k1": self.k1,
+            "b": self.b,
+            "docs": self.docs,
+            "doc_len": self.doc_len,
+            "postings": postings,
+            "landmarks": [list(phrase) for phrase in self.landmarks],
+        }
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"))
+        logger.info(f"💾 BM25 index saved to {path} ({len(self.postings)} terms, {len(self.landmarks)} landmarks)")
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_INDEX_PATH):
+        """Load an index written by save(); returns None if missing."""
+        if not os.path.exists(path):
+            logger.warning(f"⚠️ BM25 index not found at {path}")
+            return None
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            payload = json.load(f)
+
+        index = cls(
+            k1=payload.get("k1", 1.5),
+            b=payload.get("b", 0.75),
+            landmarks=payload.get("landmarks", []),
+        )
+        index.docs = payload["docs"]
+        index.doc_len = payload["doc_len"]
+        for term, (deltas, tfs) in payload["postings"].items():
+            ids, acc = [], 0
+            for d in deltas:
+                acc += d
+                ids.append(acc)
+            index.postings[term] = (ids, tfs)
+        index._finalize()
+        return index
+
+    # ---------------------- Query ---------------------- #
+    def search(self, query: str, k: int = 3):
+        """Return [(doc_id, score), ...] best first."""
+        scores = {}
+        k1, b, avgdl = self.k1, self.b, self.avgdl or 1.0
+        for term in set(tokenize(query)):
+            posting = self.postings.get(term)
+            if not posting:
+                continue
+            idf = self.idf[term]
+            for doc_id, tf in zip(*posting):
+                norm = k1 * (1 - b + b * self.doc_len[doc_id] / avgdl)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (k1 + 1) / (tf + norm)
+        return sorted(scores.items(), key=lambda x: x[1], reverse=True)[:k]
+
+    def has_landmark(self, query: str) -> bool:
+        """True if the query names a known landmark whose terms the corpus contains."""
+        tokens = tuple(tokenize(query))
+        for phrase in self.landmarks:
+            if not all(t in self.postings for t in phrase):
+                continue
+            n = len(phrase)
+            if any(tokens[i:i + n] == phrase for i in range(len(tokens) - n + 1)):
+                return True
+        return False
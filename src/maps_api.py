@@ -1,4 +1,5 @@
 import os
+import math
 import requests
 from flask import Blueprint, jsonify, request
 from dotenv import load_dotenv
@@ -11,6 +12,9 @@ maps_bp = Blueprint("maps_api", __name__)
 
 ORS_API_KEY = os.getenv("ORS_API_KEY")
 
+NEARBY_MAX_RADIUS_KM = 50.0
+NEARBY_MAX_K = 50
+
 
 # ---------------------- ORS Key Route ---------------------- #
 @maps_bp.route("/api/map-key")
@@ -86,6 +90,62 @@ def geocode():
     return jsonify({"error": "Place not found"}), 404
 
 
+# ---------------------- Nearby Search (local spatial index) ---------------------- #
+@maps_bp.route("/api/nearby")
+def nearby():
+    """
+    Nearby places from the local dataset.
+    Centre: ?lat=&lon= or ?q=<place name>. Optional: radius_km (≤ 50), k (1–50), category (comma-separated).
+    With radius_km → all places in radius (nearest first, capped at k); otherwise k nearest.
+    """
+    try:
+        # Lazy import: keep /api/route and /api/geocode working without numpy
+        from src.places_index import get_places_index
+    except Exception as e:
+        print(f"🚨 Nearby index unavailable: {e}")
+        return jsonify({"error": "Nearby search not available"}), 503
+
+    try:
+        index = get_places_index()
+        query = request.args.get("q", "").strip()
+        lat = request.args.get("lat", type=float)
+        lon = request.args.get("lon", type=float)
+
+        center = None
+        if lat is not None and lon is not None:
+            if not (math.isfinite(lat) and math.isfinite(lon) and -90 <= lat <= 90 and -180 <= lon <= 180):
+                return jsonify({"error": "'lat' must be in [-90, 90] and 'lon' in [-180, 180]"}), 400
+            center = {"label": query or "Selected point", "lat": lat, "lon": lon}
+        elif query:
+            place = index.find_place(query, strict=False) or geocode_place(query)
+            if place:
+                center = {"label": place.get("name") or place.get("label"), "lat": place["lat"], "lon": place["lon"]}
+        if not center:
+            return jsonify({"error": "Provide 'lat' and 'lon' or a known place in 'q'"}), 400
+
+        categories = [c.strip() for c in request.args.get("category", "").split(",") if c.strip()]
+
+        k = request.args.get("k", default=10, type=int)
+        if k < 1:
+            return jsonify({"error": "'k' must be a positive integer"}), 400
+        k = min(k, NEARBY_MAX_K)
+
+        radius_km = request.args.get("radius_km", type=float)
+        if radius_km is not None:
+            if not math.isfinite(radius_km) or radius_km <= 0:
+                return jsonify({"error": "'radius_km' must be a positive number"}), 400
+            radius_km = min(radius_km, NEARBY_MAX_RADIUS_KM)
+            results = index.within_radius(center["lat"], center["lon"], radius_km, categories, limit=k)
+        else:
+            results = index.nearest(center["lat"], center["lon"], k, categories)
+
+        return jsonify({"center": center, "results": results})
+
+    except Exception as e:
+        print(f"🚨 Nearby API error: {e}")
+        return jsonify({"error": str(e)}), 500
+
+
 # ---------------------- Geocode Helper Function ---------------------- #
 def geocode_place(query: str):
     """Use OpenStreetMap (Nominatim) to get coordinates for a landmark."""
@@ -0,0 +1,154 @@
+import json
+import os
+import re
+from functools import lru_cache
+import numpy as np
+
+NAME_RE = re.compile(r"[^a-z0-9' ]+")
+
+# A one-word name ("victoria", "maidan") only counts as a place in free text
+# when one of these words comes right before it ("near Esplanade").
+LOCATION_CUES = {
+    "near", "around", "at", "in", "to", "from", "visit", "visiting", "reach",
+    "via", "beside", "behind", "opposite", "about", "of", "compare", "vs",
+    "versus", "and", "or", "between",
+}
+
+PLACES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "places.json")
+
+EARTH_RADIUS_KM = 6371.0088
+CELL_DEG = 0.01  # ~1.1 km grid cells
+
+
+def haversine_km(lat, lon, lats, lons):
+    """Vectorized great-circle distance from one point to arrays of points."""
+    lat, lon = np.radians(lat), np.radians(lon)
+    lats, lons = np.radians(lats), np.radians(lons)
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class PlacesIndex:
+    """In-memory grid index over local places (attractions, restaurants, transit)."""
+
+    def __init__(self, places):
+        self.places = places
+        self.lats = np.array([p["lat"] for p in places], dtype=np.float64)
+        self.lons = np.array([p["lon"] for p in places], dtype=np.float64)
+        self.categories = np.array([p["category"] for p in places])
+
+        self.cells = {}
+        for i, key in enumerate(zip(self._cell(self.lats), self._cell(self.lons))):
+            self.cells.setdefault(key, []).append(i)
+
+        # normalised name/alias -> place position, longest first for matching
+        names = {}
+        for i, p in enumerate(places):
+            for name in [p["name"], *p.get("aliases", [])]:
+                names[_normalise(name)] = i
+        self.names = sorted(names.items(), key=lambda x: len(x[0]), reverse=True)
+
+    @staticmethod
+    def _cell(deg):
+        return np.floor(np.asarray(deg) / CELL_DEG).astype(int).tolist()
+
+    def _category_mask(self, idx, categories):
+        if not categories:
+            return np.ones(len(idx), dtype=bool)
+        return np.isin(self.categories[idx], list(categories))
+
+    def _results(self, idx, dist):
+        return [
+            {**self.places[i], "distance_km": round(float(d), 3)}
+            for i, d in zip(idx.tolist(), dist.tolist())
+        ]
+
+    # ---------------------- Queries ---------------------- #
+    def within_radius(self, lat, lon, radius_km=2.0, categories=None, limit=None):
+        """Places within radius_km of (lat, lon), nearest first."""
+        dlat = radius_km / 111.0
+        dlon = radius_km / (111.0 * max(np.cos(np.radians(lat)), 1e-6))
+        lat0, lat1 = self._cell([lat - dlat, lat + dlat])
+        lon0, lon1 = self._cell([lon - dlon, lon + dlon])
+
+        # Wide windows (large radius, near the poles) cost more to walk than
+        # scanning every place, so fall back to the plain vectorized scan.
+        if (lat1 - lat0 + 1) * (lon1 - lon0 + 1) > len(self.cells):
+            idx = np.arange(len(self.places))
+        else:
+            candidates = [
+                i
+                for ci in range(lat0, lat1 + 1)
+                for cj in range(lon0, lon1 + 1)
+                for i in self.cells.get((ci, cj), ())
+            ]
+            if not candidates:
+                return []
+            idx = np.array(candidates)
+
+        idx = idx[self._category_mask(idx, categories)]
+        dist = haversine_km(lat, lon, self.lats[idx], self.lons[idx])
+        keep = dist <= radius_km
+        idx, dist = idx[keep], dist[keep]
+        order = np.argsort(dist)[:limit]
+        return self._results(idx[order], dist[order])
+
+    def nearest(self, lat, lon, k=5, categories=None):
+        """k nearest places to (lat, lon)."""
+        idx = np.flatnonzero(self._category_mask(np.arange(len(self.places)), categories))
+        if not len(idx) or k <= 0:
+            return []
+        dist = haversine_km(lat, lon, self.lats[idx], self.lons[idx])
+        k = min(k, len(idx))
+        top = np.argpartition(dist, k - 1)[:k]
+        top = top[np.argsort(dist[top])]
+        return self._results(idx[top], dist[top])
+
+    def find_places(self, text, strict=True):
+        """
+        Places named in free text, in order of mention (longest names win overlaps).
+        strict: one-word names need a location cue just before them.
+        """
+        t = " " + _normalise(text) + " "
+        taken, found = [], {}
+        for name, i in self.names:
+            bare = " " not in name
+            start = t.find(f" {name} ")
+            while start != -1:
+                span = (start + 1, start + 1 + len(name))
+                overlaps = any(span[0] < e and s < span[1] for s, e in taken)
+                preceding = t[:start].split()[-1:]
+                cued = not bare or not strict or t.strip() == name or (preceding and preceding[0] in LOCATION_CUES)
+                if not overlaps and cued:
+                    taken.append(span)
+                    found.setdefault(i, span[0])
+                start = t.find(f" {name} ", start + 1)
+        return [self.places[i] for i in sorted(found, key=found.get)]
+
+    def find_place(self, text, strict=True):
+        """First place named in free text, if any."""
+        places = self.find_places(text, strict)
+        return places[0] if places else None
+
+
+def _normalise(text):
+    return " ".join(NAME_RE.sub(" ", (text or "").lower()).split())
+
+
+@lru_cache(maxsize=1)
+def get_places_index(path: str = PLACES_PATH):
+    """Load places dataset once and build the index."""
+    with open(path, encoding="utf-8") as f:
+        return PlacesIndex(json.load(f))
+
+
+def nearby_context(place, results):
+    """Format nearby results as plain-text context for the LLM prompt."""
+    if not place or not results:
+        return ""
+    lines = [f"- {r['name']} ({r['category']}, {r['distance_km']:.1f} km)" for r in results]
+    return (
+        f"\n\nLocal data — places near {place['name']} (straight-line distance):\n"
+        + "\n".join(lines)
+        + "\nUse these when suggesting what is nearby."
+    )
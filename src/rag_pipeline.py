@@ -1,12 +1,16 @@
 import re
 import unicodedata
 import os
+from typing import Any
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_huggingface import HuggingFaceEmbeddings
 from langchain_pinecone import PineconeVectorStore
 from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
 from helper import get_pinecone_index
 from logger import get_logger
+from bm25_index import BM25Index, DEFAULT_INDEX_PATH
 
 logger = get_logger(__name__)
 
@@ -20,8 +24,8 @@ def clean_text(text: str) -> str:
     text = re.sub(r"\s+", " ", text)
     return text.strip()
 
-def build_rag_index(pdf_path="data/Tourism Of West Bengal.pdf", index_name="tourism"):
-    """Build or update RAG index with cleaned PDF."""
+def build_rag_index(pdf_path="data/Tourism Of West Bengal.pdf", index_name="tourism", bm25_path=DEFAULT_INDEX_PATH):
+    """Build or update RAG index (Pinecone + local BM25) with cleaned PDF."""
     logger.info(f"📄 Loading {pdf_path}")
     loader = PyPDFLoader(pdf_path)
     documents = loader.load()
@@ -33,16 +37,74 @@ def build_rag_index(pdf_path="data/Tourism Of West Bengal.pdf", index_name="tour
     chunks = splitter.split_documents(documents)
     logger.info(f"✅ Split into {len(chunks)} chunks")
 
+    BM25Index.from_texts(
+        [c.page_content for c in chunks],
+        [c.metadata for c in chunks],
+    ).save(bm25_path)
+
     embedding = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
     index = get_pinecone_index(index_name)
 
     PineconeVectorStore.from_documents(documents=chunks, embedding=embedding, index=index)
     logger.info("✅ RAG index built successfully.")
 
-def get_retriever(index_name="tourism"):
-    """Return retriever for query-time search."""
+class HybridRetriever(BaseRetriever):
+    """Fuse BM25 and vector scores; BM25 only when the query names a landmark."""
+
+    vector_store: Any
+    lexical_index: Any = None
+    k: int = 3
+    alpha: float = 0.5   # weight of the lexical score in the fused ranking
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        query = clean_text(query)
+        bm25 = self.lexical_index
+
+        # Fast path: proper-noun queries skip the embedding forward pass.
+        if bm25 and bm25.has_landmark(query):
+            hits = bm25.search(query, k=self.k)
+            if hits:
+                return [self._to_document(doc_id) for doc_id, _ in hits]
+
+        fetch_k = self.k * 3
+        vector_hits = self.vector_store.similarity_search_with_score(query, k=fetch_k)
+        if not bm25:
+            return [doc for doc, _ in vector_hits[:self.k]]
+
+        lexical_hits = bm25.search(query, k=fetch_k)
+        docs, fused = {}, {}
+        for text, score in _normalize([(d.page_content, s) for d, s in vector_hits]):
+            fused[text] = fused.get(text, 0.0) + (1 - self.alpha) * score
+        for doc, _ in vector_hits:
+            docs.setdefault(doc.page_content, doc)
+        for doc_id, score in _normalize(lexical_hits):
+            text = bm25.docs[doc_id]["text"]
+            fused[text] = fused.get(text, 0.0) + self.alpha * score
+            docs.setdefault(text, self._to_document(doc_id))
+
+        ranked = sorted(fused.items(), key=lambda x: x[1], reverse=True)[:self.k]
+        return [docs[text] for text, _ in ranked]
+
+    def _to_document(self, doc_id):
+        entry = self.lexical_index.docs[doc_id]
+        return Document(page_content=entry["text"], metadata=entry.get("metadata", {}))
+
+
+def _normalize(hits):
+    """Min-max scale [(key, score), ...] into [0, 1]."""
+    if not hits:
+        return []
+    scores = [s for _, s in hits]
+    lo, hi = min(scores), max(scores)
+    if hi == lo:
+        return [(key, 1.0) for key, _ in hits]
+    return [(key, (s - lo) / (hi - lo)) for key, s in hits]
+
+
+def get_retriever(index_name="tourism", bm25_path=DEFAULT_INDEX_PATH):
+    """Return hybrid (BM25 + vector) retriever for query-time search."""
     from langchain_pinecone import PineconeVectorStore
     embedding = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
     index = get_pinecone_index(index_name)
     store = PineconeVectorStore(index=index, embedding=embedding)
-    return store.as_retriever(search_type="similarity", search_kwargs={"k": 3})
+    return HybridRetriever(vector_store=store, lexical_index=BM25Index.load(bm25_path), k=3)
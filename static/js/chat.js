@@ -52,6 +52,11 @@ let isRecording = false;
 let mediaRecorder;
 let audioChunks = [];
 let currentStream = null;
+let voiceSocket = null;
+let voiceRejected = false;  // server refused this utterance (e.g. too long) — no /speech retry
+let turnPending = false;    // "end" sent, still waiting for "done"/"error"
+let replyAudioQueue = [];
+let replyAudioPlaying = false;
 
 /* -----------------------------------
    CSS injection (sidebar/header/hero)
@@ -348,6 +353,25 @@ function cleanText(text = "") {
     .trim();
 }
 
+/* ----------------------------------------------
+   Static map helpers (numbered markers + zoom fit)
+   ---------------------------------------------- */
+const MAP_SIZE = { w: 600, h: 300 };
+const MAP_NUMBERED_MARKERS = 5;  // staticmap.openstreetmap.de ships lightblue1..lightblue5
+
+// Largest zoom at which every point fits around the fixed centre (with margin)
+function fitMapZoom(center, points, maxZoom = 15, minZoom = 10) {
+  const dLat = Math.max(0, ...points.map((p) => Math.abs(p.lat - center.lat)));
+  const dLon = Math.max(0, ...points.map((p) => Math.abs(p.lon - center.lon)));
+  if (!dLat && !dLon) return maxZoom;
+  const margin = 2.4;  // both sides of the centre + 20% padding
+  const cosLat = Math.cos((center.lat * Math.PI) / 180);
+  const byLon = dLon ? (MAP_SIZE.w * 360) / (256 * margin * dLon) : Infinity;
+  const byLat = dLat ? (MAP_SIZE.h * 360 * cosLat) / (256 * margin * dLat) : Infinity;
+  const zoom = Math.floor(Math.log2(Math.min(byLon, byLat)));
+  return Math.max(minZoom, Math.min(maxZoom, zoom));
+}
+
 /* ------------------------------------
    Render a message bubble (unchanged)
    ------------------------------------ */
@@ -372,7 +396,13 @@ function appendMessage(sender, text, mapData = null) {
 
     const mapThumb = document.createElement("img");
     mapThumb.className = "map-thumb";
-    mapThumb.src = `https://staticmap.openstreetmap.de/staticmap.php?center=${mapData.lat},${mapData.lon}&zoom=15&size=600x300&markers=${mapData.lat},${mapData.lon},red-pushpin`;
+    // Nearby places (from the local spatial index) as numbered markers
+    const nearby = (Array.isArray(mapData.nearby) ? mapData.nearby : []).slice(0, MAP_NUMBERED_MARKERS);
+    const markers = [`${mapData.lat},${mapData.lon},red-pushpin`]
+      .concat(nearby.map((p, i) => `${p.lat},${p.lon},lightblue${i + 1}`))
+      .join("|");
+    const zoom = fitMapZoom(mapData, nearby);
+    mapThumb.src = `https://staticmap.openstreetmap.de/staticmap.php?center=${mapData.lat},${mapData.lon}&zoom=${zoom}&size=${MAP_SIZE.w}x${MAP_SIZE.h}&markers=${markers}`;
     mapThumb.alt = mapData.label || "Location map";
     mapThumb.style.cursor = "pointer";
 
@@ -383,7 +413,8 @@ function appendMessage(sender, text, mapData = null) {
     mapLabel.style.margin = "6px 2px";
 
     const mapEmbed = document.createElement("iframe");
-    mapEmbed.src = `https://www.openstreetmap.org/export/embed.html?bbox=${mapData.lon - 0.005},${mapData.lat - 0.005},${mapData.lon + 0.005},${mapData.lat + 0.005}&layer=mapnik&marker=${mapData.lat},${mapData.lon}`;
+    const pad = Math.max(0.005, ...nearby.map((p) => 1.2 * Math.max(Math.abs(p.lat - mapData.lat), Math.abs(p.lon - mapData.lon))));
+    mapEmbed.src = `https://www.openstreetmap.org/export/embed.html?bbox=${mapData.lon - pad},${mapData.lat - pad},${mapData.lon + pad},${mapData.lat + pad}&layer=mapnik&marker=${mapData.lat},${mapData.lon}`;
     mapEmbed.width = "100%";
     mapEmbed.height = "300";
     mapEmbed.style.border = "none";
@@ -396,6 +427,19 @@ function appendMessage(sender, text, mapData = null) {
 
     mapContainer.appendChild(mapThumb);
     mapContainer.appendChild(mapLabel);
+
+    if (nearby.length) {
+      const list = document.createElement("ol");
+      list.style.fontSize = "0.85rem";
+      list.style.color = "#6c7684";
+      list.style.margin = "4px 2px 6px 22px";
+      nearby.forEach((p) => {
+        const li = document.createElement("li");
+        li.textContent = `${p.name} · ${p.category} · ${Number(p.distance_km).toFixed(1)} km`;
+        list.appendChild(li);
+      });
+      mapContainer.appendChild(list);
+    }
     mapContainer.appendChild(mapEmbed);
     bubble.appendChild(mapContainer);
   }
@@ -481,6 +525,150 @@ document.addEventListener("DOMContentLoaded", () => {
   }
 });
 
+/* ---------------------------------
+   Voice helpers (detected language)
+   --------------------------------- */
+function applyDetectedLanguage(code) {
+  if (!code) return;
+  const newLang = Object.keys(LANGUAGE_CODES).find((k) => LANGUAGE_CODES[k] === code);
+  if (newLang) langSelect.value = newLang;
+}
+
+/* -----------------------------------------
+   Reply audio queue (segments play in order)
+   ----------------------------------------- */
+function enqueueReplyAudio(blob) {
+  replyAudioQueue.push(blob);
+  if (!replyAudioPlaying) playNextReplyAudio();
+}
+
+function playNextReplyAudio() {
+  const blob = replyAudioQueue.shift();
+  if (!blob) { replyAudioPlaying = false; return; }
+  replyAudioPlaying = true;
+  const url = URL.createObjectURL(blob);
+  const audio = new Audio(url);
+  const next = () => { URL.revokeObjectURL(url); playNextReplyAudio(); };
+  audio.onended = next;
+  audio.onerror = next;
+  audio.play().catch((err) => { console.error(err); next(); });
+}
+
+/* -------------------------------------------
+   WebSocket voice: stream chunks while talking
+   ------------------------------------------- */
+const VOICE_SOCKET_TIMEOUT_MS = 3000;
+
+function openVoiceSocket(mimeType) {
+  return new Promise((resolve) => {
+    let ws;
+    let settled = false;
+    const finish = (value) => {
+      if (settled) return;
+      settled = true;
+      clearTimeout(timer);
+      resolve(value);
+    };
+    const timer = setTimeout(() => {
+      // Handshake hung — give up and use the /speech upload instead
+      if (ws) { ws.onclose = null; ws.close(); }
+      finish(null);
+    }, VOICE_SOCKET_TIMEOUT_MS);
+
+    try {
+      const proto = window.location.protocol === "https:" ? "wss" : "ws";
+      ws = new WebSocket(`${proto}://${window.location.host}/ws/speech`);
+    } catch (err) {
+      finish(null);
+      return;
+    }
+    ws.binaryType = "blob";
+
+    let pendingAudioMime = null;
+    let heardBack = false;  // server already answered part of this turn
+    ws.onmessage = (e) => {
+      heardBack = true;
+      if (typeof e.data !== "string") {
+        enqueueReplyAudio(new Blob([e.data], { type: pendingAudioMime || "audio/mpeg" }));
+        pendingAudioMime = null;
+        return;
+      }
+      const msg = JSON.parse(e.data);
+      if (msg.type === "transcript") {
+        applyDetectedLanguage(msg.detected_language);
+        appendMessage("user", msg.text);
+      } else if (msg.type === "reply") {
+        applyDetectedLanguage(msg.detected_language);
+        appendMessage("bot", msg.response, msg.map_data);
+      } else if (msg.type === "audio") {
+        pendingAudioMime = msg.mime;
+      } else if (msg.type === "error") {
+        voiceRejected = true;
+        appendMessage("bot", `⚠️ ${msg.error}`);
+        if (mediaRecorder && mediaRecorder.state !== "inactive") mediaRecorder.stop();
+      }
+      if (msg.type === "done" || msg.type === "error") {
+        turnPending = false;
+        ws.close();
+      }
+    };
+
+    ws.onopen = () => {
+      if (settled) { ws.close(); return; }
+      ws.send(JSON.stringify({ type: "start", mime: mimeType || "audio/webm" }));
+      finish(ws);
+    };
+    ws.onerror = () => finish(null);
+    ws.onclose = () => {
+      if (voiceSocket === ws) voiceSocket = null;
+      if (!turnPending) return;
+      // Socket dropped mid-turn (worker restart, network): retry over HTTP
+      // unless the server already started answering, then just report it.
+      turnPending = false;
+      if (heardBack) {
+        appendMessage("bot", "⚠️ Voice connection lost before the reply finished.");
+      } else {
+        uploadRecording(mimeType, false).catch((err) => {
+          console.error("🎤 Voice upload error:", err);
+          appendMessage("bot", "⚠️ Could not process your voice. Please try again.");
+        });
+      }
+    };
+  });
+}
+
+/* ----------------------------------------
+   Fallback: upload whole utterance (/speech)
+   ---------------------------------------- */
+async function uploadRecording(preferredType, announce = true) {
+  const usingOgg = preferredType.includes("ogg");
+  const blobType = usingOgg ? "audio/ogg" : "audio/webm";
+  const ext      = usingOgg ? "ogg" : "webm";
+  const blob     = new Blob(audioChunks, { type: blobType });
+
+  const formData = new FormData();
+  formData.append("audio", blob, `mic_input.${ext}`);
+  formData.append("language", langSelect.value);
+
+  if (announce) appendMessage("user", "🎧 Processing your voice...");
+
+  const res = await fetch("/speech", { method: "POST", body: formData });
+  const contentType = res.headers.get("Content-Type");
+
+  applyDetectedLanguage(res.headers.get("X-Detected-Language"));
+
+  if (contentType && contentType.includes("audio")) {
+    const audioBlob = await res.blob();
+    const url = URL.createObjectURL(audioBlob);
+    const audio = new Audio(url);
+    await audio.play().catch(console.error);
+    appendMessage("bot", "🔊 Voice reply playing…");
+  } else {
+    const data = await res.json();
+    if (data.response) appendMessage("bot", data.response, data.map_data);
+  }
+}
+
 /* ---------------
    Voice handling
    --------------- */
@@ -500,8 +688,17 @@ micBtn.addEventListener("click", async () => {
         : new MediaRecorder(currentStream);
 
       audioChunks = [];
-
-      mediaRecorder.ondataavailable = (e) => audioChunks.push(e.data);
+      voiceRejected = false;
+      turnPending = false;
+      voiceSocket = await openVoiceSocket(preferredType);
+
+      mediaRecorder.ondataavailable = (e) => {
+        if (!e.data || !e.data.size) return;
+        audioChunks.push(e.data);  // kept for the /speech fallback if the socket drops
+        if (voiceSocket && voiceSocket.readyState === WebSocket.OPEN) {
+          voiceSocket.send(e.data);
+        }
+      };
 
       mediaRecorder.onstart = () => {
         isRecording = true;
@@ -517,37 +714,13 @@ micBtn.addEventListener("click", async () => {
         micBtn.classList.add("secondary");
         micBtn.innerHTML = micSVG;
 
-        const usingOgg = preferredType.includes("ogg");
-        const blobType = usingOgg ? "audio/ogg" : "audio/webm";
-        const ext      = usingOgg ? "ogg" : "webm";
-        const blob     = new Blob(audioChunks, { type: blobType });
-
-        const formData = new FormData();
-        formData.append("audio", blob, `mic_input.${ext}`);
-        formData.append("language", langSelect.value);
-
-        appendMessage("user", "🎧 Processing your voice...");
-
-        const res = await fetch("/speech", { method: "POST", body: formData });
-        const contentType = res.headers.get("Content-Type");
-
-        const detectedLang = res.headers.get("X-Detected-Language");
-        if (detectedLang) {
-          const newLang = Object.keys(LANGUAGE_CODES).find(
-            (k) => LANGUAGE_CODES[k] === detectedLang
-          );
-          if (newLang) langSelect.value = newLang;
-        }
-
-        if (contentType && contentType.includes("audio")) {
-          const audioBlob = await res.blob();
-          const url = URL.createObjectURL(audioBlob);
-          const audio = new Audio(url);
-          await audio.play().catch(console.error);
-          appendMessage("bot", "🔊 Voice reply playing…");
-        } else {
-          const data = await res.json();
-          if (data.response) appendMessage("bot", data.response, data.map_data);
+        if (voiceSocket && voiceSocket.readyState === WebSocket.OPEN) {
+          // End-of-speech: server starts STT right away and streams results back
+          turnPending = true;
+          voiceSocket.send(JSON.stringify({ type: "end" }));
+          appendMessage("user", "🎧 Processing your voice...");
+        } else if (!voiceRejected) {
+          await uploadRecording(preferredType);
         }
 
         if (currentStream) {
@@ -556,7 +729,8 @@ micBtn.addEventListener("click", async () => {
         }
       };
 
-      mediaRecorder.start();
+      // Small timeslice so chunks are uploaded while the user is still speaking
+      mediaRecorder.start(voiceSocket ? 250 : undefined);
     } catch (err) {
       console.error("🎤 Mic error:", err);
       alert("Please allow microphone access to use voice features.");